@@ -1,12 +1,65 @@
+import math
+import os
+import sys
+from functools import partial
+import dask
+import dask.dataframe as dd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import logging
-from sqlalchemy import create_engine, exc
+from dask.distributed import Client, LocalCluster
+from numba import njit, prange
+import adbc_driver_postgresql.dbapi as pgadbc
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
 
 # File Path Configuration
 RAW_DATA_PATH = 'Car_Insurance_Claim.csv'
+CLEAN_DATA_PATH = 'clean_car_insurance_claim.parquet'
+
+# Explicit types for every raw column, so no reader has to guess from a sample.
+# AGE stays a string so transform_data can coerce the mixed values itself.
+RAW_COLUMN_TYPES = {
+    'ID': pa.string(),
+    'AGE': pa.string(),
+    'GENDER': pa.string(),
+    'RACE': pa.string(),
+    'DRIVING_EXPERIENCE': pa.string(),
+    'EDUCATION': pa.string(),
+    'INCOME': pa.string(),
+    'CREDIT_SCORE': pa.float64(),
+    'VEHICLE_OWNERSHIP': pa.float64(),
+    'VEHICLE_YEAR': pa.string(),
+    'MARRIED': pa.float64(),
+    'CHILDREN': pa.float64(),
+    'POSTAL_CODE': pa.int64(),
+    'ANNUAL_MILEAGE': pa.float64(),
+    'VEHICLE_TYPE': pa.string(),
+    'SPEEDING_VIOLATIONS': pa.int64(),
+    'DUIS': pa.int64(),
+    'PAST_ACCIDENTS': pa.int32(),
+    'OUTCOME': pa.float64(),
+}
+# pandas dtypes for Arrow columns: text stays in Arrow buffers rather than
+# becoming one Python object per row, and integers stay integers when blank
+ARROW_TO_PANDAS = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+}
+# The same schema for the Dask reader, so every partition parses to the same dtypes
+RAW_COLUMN_DTYPES = {
+    name: ARROW_TO_PANDAS.get(typ, 'float64') for name, typ in RAW_COLUMN_TYPES.items()
+}
+
+# Inputs larger than this are split into partitions of this size and
+# transformed in parallel on a local Dask cluster
+DASK_BLOCKSIZE = 64 * 1024 * 1024
 
 # Database Configuration
 DB_USER = 'postgres'
@@ -15,104 +68,331 @@ DB_HOST = 'localhost'
 DB_PORT = '5432'
 DB_NAME = 'postgres' # Default database
 TABLE_NAME = 'claims_data'
+DB_CONNECTION_STR = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+
+# --- Compiled Kernels ---
+
+@njit(cache=True)
+def parse_ages(offsets, data, out):
+    """
+    Parses each UTF-8 string described by an Arrow offsets/data buffer pair
+    as a decimal number, writing NaN for anything that is not one.
+    """
+    for i in range(out.size):
+        start = offsets[i]
+        end = offsets[i + 1]
+        # Skip surrounding whitespace
+        while start < end and (data[start] == 32 or data[start] == 9):
+            start += 1
+        while end > start and (data[end - 1] == 32 or data[end - 1] == 9):
+            end -= 1
+
+        sign = 1.0
+        if start < end and (data[start] == 43 or data[start] == 45): # '+' / '-'
+            if data[start] == 45:
+                sign = -1.0
+            start += 1
+
+        value = 0.0
+        scale = 1.0
+        digits = 0
+        seen_point = False
+        valid = start < end
+        for j in range(start, end):
+            c = data[j]
+            if 48 <= c <= 57: # '0'-'9'
+                value = value * 10.0 + (c - 48)
+                digits += 1
+                if seen_point:
+                    scale *= 10.0
+            elif c == 46 and not seen_point: # '.'
+                seen_point = True
+            else:
+                valid = False
+                break
+
+        out[i] = sign * value / scale if valid and digits > 0 else np.nan
+
+@njit(parallel=True, cache=True)
+def transform_kernel(age, credit_score, annual_mileage, age_median, credit_score_median,
+                     annual_mileage_median, age_bins, out_credit_score, out_annual_mileage, out_age_codes):
+    """
+    Fills missing values with the given medians, narrows credit score and
+    mileage to float32, and writes the left-closed age bin index (or -1 when
+    the age falls outside every bin) in one fused pass over the rows.
+    """
+    for i in prange(age.size):
+        cs = credit_score[i]
+        out_credit_score[i] = credit_score_median if np.isnan(cs) else cs
+        mileage = annual_mileage[i]
+        out_annual_mileage[i] = annual_mileage_median if np.isnan(mileage) else mileage
+
+        # Ages are truncated to whole years before binning. The range check runs
+        # on the float, so out-of-range ages can never wrap into a bin when narrowed
+        a = np.trunc(age_median if np.isnan(age[i]) else age[i])
+        code = -1
+        if age_bins[0] <= a < age_bins[-1]:
+            years = int(a)
+            code = 0
+            while years >= age_bins[code + 1]:
+                code += 1
+        out_age_codes[i] = code
 
 # --- ETL Functions ---
 
 def extract_data(file_path):
-    """Extracts data from a CSV file."""
-    logging.info(f"Starting data extraction from: {file_path}")
+    """
+    Extracts data from a CSV file.
+    PAST_ACCIDENTS is reduced to a HAD_PAST_ACCIDENTS flag as it is read.
+    """
+    log.info("Starting data extraction from: %s", file_path)
     try:
-        df = pd.read_csv(file_path)
-        logging.info(f"Successfully extracted {len(df)} rows of data.")
+        # strings_can_be_null keeps pandas' semantics: blank/NA/NULL text is missing, not ''
+        convert_options = pacsv.ConvertOptions(column_types=RAW_COLUMN_TYPES, strings_can_be_null=True)
+        table = pacsv.read_csv(file_path, convert_options=convert_options)
+        idx = table.schema.get_field_index('PAST_ACCIDENTS')
+        had_past_accidents = pc.fill_null(pc.greater(table.column(idx), 0), False).cast(pa.int8())
+        table = table.set_column(idx, 'HAD_PAST_ACCIDENTS', had_past_accidents)
+        df = table.to_pandas(types_mapper=ARROW_TO_PANDAS.get)
+        log.info("Successfully extracted %s rows of data.", len(df))
         return df
     except FileNotFoundError:
-        logging.error(f"Extraction failed: File not found at {file_path}")
+        log.error("Extraction failed: File not found at %s", file_path)
         return None
 
-def transform_data(df):
-    """Transforms the raw claims data."""
+def coerce_age(values):
+    """Converts the raw age values to float64, coercing non-numeric values to NaN."""
+    arr = pa.array(values, type=pa.string(), from_pandas=True)
+    # Arrow-backed columns hand over their existing chunks instead of being re-encoded
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    _, offsets_buf, data_buf = arr.buffers()
+    offsets = np.frombuffer(offsets_buf, dtype=np.int32)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.empty(0, dtype=np.uint8)
+
+    out = np.empty(len(arr), dtype=np.float64)
+    parse_ages(offsets, data, out)
+    if arr.null_count:
+        out[arr.is_null().to_numpy(zero_copy_only=False)] = np.nan
+    return pd.Series(out, index=values.index, name=values.name)
+
+def fast_median(values):
+    """
+    Returns the median of a numeric Series, ignoring NaN, by partial
+    selection (np.partition) rather than a full sort.
+    """
+    a = values.to_numpy(dtype=np.float64)
+    a = a[~np.isnan(a)]
+    if a.size == 0:
+        return np.nan
+    k = a.size // 2
+    if a.size % 2:
+        a.partition(k)
+        return a[k]
+    a.partition([k - 1, k])
+    return 0.5 * (a[k - 1] + a[k])
+
+def transform_data(df, medians=None):
+    """
+    Transforms the raw claims data.
+    Missing values are filled with `medians` when given (a mapping of
+    column name to value), otherwise with the medians of `df` itself.
+    Works on `df` in place, so callers should not reuse the raw frame.
+    """
     if df is None:
-        logging.warning("Transformation skipped: Input DataFrame is None.")
+        log.warning("Transformation skipped: Input DataFrame is None.")
         return None
         
-    logging.info("Starting data transformation...")
-    df = df.copy()
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    logging.info("Standardized column names.")
-    
-    df['age'] = pd.to_numeric(df['age'], errors='coerce')
-    logging.info("Cleaned 'age' column.")
-
-    df['credit_score'] = df['credit_score'].fillna(df['credit_score'].median())
-    df['annual_mileage'] = df['annual_mileage'].fillna(df['annual_mileage'].median())
-    age_median = df['age'].median()
-    if pd.isna(age_median):
-        age_median = 30 
-    df['age'] = df['age'].fillna(age_median)
-    logging.info("Handled missing values.")
+    log.info("Starting data transformation...")
+    df.columns = [c.lower().replace(' ', '_') for c in df.columns]
+    log.info("Standardized column names.")
     
-    df['id'] = df['id'].astype(str)
-    df['age'] = df['age'].astype(int)
-    logging.info("Corrected data types.")
-    
-    age_bins = [16, 25, 40, 65, 100]
+    df['age'] = coerce_age(df['age'])
+    log.info("Cleaned 'age' column.")
+
+    fill_cols = ['credit_score', 'annual_mileage', 'age']
+    if medians is None:
+        medians = pd.Series({col: fast_median(df[col]) for col in fill_cols}, dtype='float64')
+    else:
+        medians = pd.Series(medians, dtype='float64')
+    if math.isnan(medians['age']):
+        medians['age'] = 30
+
+    age_bins = np.array([16, 25, 40, 65, 100], dtype=np.int64)
     age_labels = ['16-25', '26-40', '41-65', '65+']
-    df['age_group'] = pd.cut(df['age'], bins=age_bins, labels=age_labels, right=False)
-    df['had_past_accidents'] = df['past_accidents'].apply(lambda x: 1 if x > 0 else 0)
-    logging.info("Engineered new features.")
+    credit_score = np.empty(len(df), dtype=np.float32)
+    annual_mileage = np.empty(len(df), dtype=np.float32)
+    age_codes = np.empty(len(df), dtype=np.int8)
+    transform_kernel(
+        df['age'].to_numpy(dtype=np.float64),
+        df['credit_score'].to_numpy(dtype=np.float64),
+        df['annual_mileage'].to_numpy(dtype=np.float64),
+        medians['age'], medians['credit_score'], medians['annual_mileage'],
+        age_bins, credit_score, annual_mileage, age_codes,
+    )
+    log.info("Handled missing values.")
 
-    df.drop(columns=['age', 'past_accidents'], inplace=True)
-    logging.info("Dropped original columns.")
+    df['credit_score'] = credit_score
+    df['annual_mileage'] = annual_mileage
+    log.info("Corrected data types.")
+
+    age_group = pd.Categorical.from_codes(age_codes, categories=age_labels, ordered=True)
+    log.info("Engineered new features.")
+
+    # Drop the source column first so the feature goes straight onto the slimmer frame
+    df = df.drop(columns=['age'])
+    df['age_group'] = age_group
+    # had_past_accidents comes from extraction; keep it as the last column
+    df['had_past_accidents'] = df.pop('had_past_accidents')
+    log.info("Dropped original columns.")
     
-    logging.info("Data transformation complete.")
+    log.info("Data transformation complete.")
     return df
 
+def transform_partition(part, medians):
+    """
+    Runs transform_data on one persisted Dask partition. transform_data works
+    in place, so it gets a shallow copy and the persisted data stays intact.
+    """
+    return transform_data(part.copy(deep=False), medians=medians)
+
+def transform_data_parallel(file_path):
+    """
+    Extracts and transforms a CSV file too large for a single partition,
+    running transform_data on each partition across a local Dask cluster.
+    Missing values are filled with medians computed over the whole file
+    rather than per partition. Returns a pandas DataFrame.
+    """
+    log.info("Starting parallel extraction and transformation of: %s", file_path)
+    # One single-threaded worker per core: cap numba too, or every worker's
+    # parallel transform_kernel would start a thread per core of its own.
+    # numba reads NUMBA_NUM_THREADS on import, which happens as a spawned worker
+    # re-imports this module, so it has to be in the environment before spawning.
+    pre_spawn_environ = {**dask.config.get('distributed.nanny.pre-spawn-environ'), 'NUMBA_NUM_THREADS': 1}
+    with dask.config.set({'distributed.nanny.pre-spawn-environ': pre_spawn_environ}), \
+            LocalCluster(n_workers=os.cpu_count(), threads_per_worker=1) as cluster, Client(cluster):
+        ddf = dd.read_csv(file_path, blocksize=DASK_BLOCKSIZE, dtype=RAW_COLUMN_DTYPES)
+        # Same past-accident flag extract_data derives at read time
+        had_past_accidents = (ddf['PAST_ACCIDENTS'] > 0).fillna(False).astype('int8')
+        ddf = ddf.assign(HAD_PAST_ACCIDENTS=had_past_accidents).drop(columns='PAST_ACCIDENTS')
+        # Parse the file once; both the medians and the transform read from this
+        ddf = ddf.persist()
+        log.info("Split input into %s partitions.", ddf.npartitions)
+
+        # Gather just the fill columns so the medians match the single-partition path exactly
+        ages = ddf['AGE'].map_partitions(coerce_age, meta=('AGE', 'f8'))
+        fill_values = dask.compute(ddf['CREDIT_SCORE'], ddf['ANNUAL_MILEAGE'], ages)
+        medians = dict(zip(['credit_score', 'annual_mileage', 'age'], map(fast_median, fill_values)))
+        log.info("Computed global medians.")
+
+        clean = ddf.map_partitions(partial(transform_partition, medians=medians))
+        df = clean.compute().reset_index(drop=True)
+
+    log.info("Parallel transformation complete: %s rows.", len(df))
+    return df
+
+def load_to_parquet(df, file_path):
+    """
+    Saves a DataFrame to a Snappy-compressed Parquet file.
+    Returns True on success, False on failure.
+    """
+    if df is None:
+        log.warning("Saving skipped: Input DataFrame is None.")
+        return False
+
+    log.info("Starting data save to Parquet file: %s", file_path)
+    try:
+        df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
+        log.info("Successfully saved %s rows to '%s'.", len(df), file_path)
+        return True
+    except OSError as e:
+        log.error("Saving failed: Could not write %s: %s", file_path, e)
+        return False
+
 def load_to_db(df, table_name, db_conn_str):
     """
     Loads a DataFrame into a PostgreSQL database table.
     Returns True on success, False on failure.
     """
     if df is None:
-        logging.warning("Loading skipped: Input DataFrame is None.")
+        log.warning("Loading skipped: Input DataFrame is None.")
         return False
 
-    logging.info(f"Starting data loading to database table: {table_name}")
+    log.info("Starting data loading to database table: %s", table_name)
     try:
-        engine = create_engine(db_conn_str)
-        df.to_sql(table_name, engine, if_exists='replace', index=False)
-        logging.info(f"Successfully loaded {len(df)} rows into '{table_name}'.")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Send categoricals as plain text columns rather than dictionaries, and
+        # unsigned integers as the next wider signed type, which the driver can
+        # ingest and which holds every value
+        widened = {pa.uint8(): pa.int16(), pa.uint16(): pa.int32(), pa.uint32(): pa.int64()}
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+            elif field.type in widened:
+                table = table.set_column(i, field.name, table.column(i).cast(widened[field.type]))
+
+        with pgadbc.connect(db_conn_str) as conn:
+            with conn.cursor() as cur:
+                cur.adbc_ingest(table_name, table, mode='replace')
+            conn.commit()
+        log.info("Successfully loaded %s rows into '%s'.", len(df), table_name)
         return True
-    except exc.OperationalError as e:
-        logging.error(f"Database connection failed: {e}")
+    except pgadbc.OperationalError as e:
+        log.error("Database connection failed: %s", e)
         return False
     except Exception as e:
-        logging.error(f"An unexpected error occurred during database loading: {e}")
+        log.error("An unexpected error occurred during database loading: %s", e)
         return False
 
+# Sinks the clean data can be loaded into, by name
+_LOADERS = {
+    'parquet': partial(load_to_parquet, file_path=CLEAN_DATA_PATH),
+    'postgres': partial(load_to_db, table_name=TABLE_NAME, db_conn_str=DB_CONNECTION_STR),
+}
+
 # --- Main Pipeline Execution ---
 
-def main():
-    """Main function to run the ETL pipeline."""
-    logging.info("--- Starting ETL Pipeline ---")
-    
-    # Step 1: Extract
-    raw_df = extract_data(RAW_DATA_PATH)
-    
-    # Step 2: Transform
-    clean_df = transform_data(raw_df)
+def run(sink='postgres'):
+    """
+    Runs the ETL pipeline, loading the clean data into the named sink.
+    Returns True on success, False on failure.
+    """
+    loader = _LOADERS.get(sink)
+    if loader is None:
+        log.error("Unknown sink '%s'. Expected one of: %s", sink, ', '.join(_LOADERS))
+        return False
+
+    log.info("--- Starting ETL Pipeline ---")
     
-    # Step 3: Load to Database
-    if clean_df is not None:
-        db_connection_str = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-        success = load_to_db(clean_df, TABLE_NAME, db_connection_str)
-        
-        # Only log success if the load function returns True
-        if success:
-            logging.info("--- ETL Pipeline Finished Successfully ---")
-        else:
-            logging.error("--- ETL Pipeline Failed During Database Load ---")
+    if os.path.exists(RAW_DATA_PATH) and os.path.getsize(RAW_DATA_PATH) > DASK_BLOCKSIZE:
+        # Steps 1 & 2: Extract and transform in parallel, partition by partition
+        clean_df = transform_data_parallel(RAW_DATA_PATH)
     else:
-        logging.error("--- ETL Pipeline Failed During Transformation ---")
+        # Step 1: Extract
+        raw_df = extract_data(RAW_DATA_PATH)
+
+        # Step 2: Transform
+        clean_df = transform_data(raw_df)
+
+    if clean_df is None:
+        log.error("--- ETL Pipeline Failed During Transformation ---")
+        return False
+
+    # Step 3: Load
+    # Only log success if the loader returns True
+    if loader(clean_df):
+        log.info("--- ETL Pipeline Finished Successfully ---")
+        return True
+    log.error("--- ETL Pipeline Failed During Load ---")
+    return False
+
+def main():
+    """
+    Main function to run the ETL pipeline. The sink defaults to the database.
+    Exits non-zero on failure so schedulers and CI notice a failed run.
+    """
+    sink = sys.argv[1] if len(sys.argv) > 1 else 'postgres'
+    sys.exit(0 if run(sink) else 1)
 
 if __name__ == "__main__":
     main()
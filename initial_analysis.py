@@ -1,26 +1,80 @@
+import math
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 
 # Load the dataset
 # Make sure 'Car_Insurance_Claim.csv' is in the same folder as this script
 try:
-    df = pd.read_csv('Car_Insurance_Claim.csv')
+    # Stream the file batch by batch, collecting everything printed below in a single pass.
+    # AGE mixes numbers and ranges, so it is read as text rather than inferred.
+    convert_options = pacsv.ConvertOptions(column_types={'AGE': pa.string()})
+    reader = pacsv.open_csv('Car_Insurance_Claim.csv', convert_options=convert_options)
+
+    head = None
+    total_rows = 0
+    stats = {}
+    for batch in reader:
+        if head is None:
+            head = batch.slice(0, 5).to_pandas()
+        total_rows += batch.num_rows
+
+        for name, col in zip(batch.schema.names, batch.columns):
+            acc = stats.setdefault(name, {'type': col.type, 'nulls': 0, 'count': 0,
+                                          'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None})
+            acc['nulls'] += col.null_count
+            if not (pa.types.is_integer(col.type) or pa.types.is_floating(col.type)):
+                continue
+
+            values = col.cast(pa.float64())
+            n_batch = len(values) - values.null_count
+            if n_batch == 0:
+                continue
+            # Merge this batch's count, mean and sum of squared deviations into the
+            # running totals (Chan et al.), which stays accurate for large values
+            mean_batch = pc.mean(values).as_py()
+            m2_batch = pc.sum(pc.power(pc.subtract(values, mean_batch), 2)).as_py()
+            n = acc['count'] + n_batch
+            delta = mean_batch - acc['mean']
+            acc['mean'] += delta * n_batch / n
+            acc['m2'] += m2_batch + delta * delta * acc['count'] * n_batch / n
+            acc['count'] = n
+            min_max = pc.min_max(values)
+            lo, hi = min_max['min'].as_py(), min_max['max'].as_py()
+            if lo is not None:
+                acc['min'] = lo if acc['min'] is None else min(acc['min'], lo)
+                acc['max'] = hi if acc['max'] is None else max(acc['max'], hi)
 
     print("--- First 5 Rows of the Dataset ---")
-    print(df.head())
+    print(head)
     print("\n" + "="*50 + "\n")
 
     print("--- Dataset Information (Data Types & Non-Null Counts) ---")
-    df.info()
+    print(f"{total_rows} entries, {len(stats)} columns")
+    for name, acc in stats.items():
+        print(f"{name:<22}{total_rows - acc['nulls']:>8} non-null  {acc['type']}")
     print("\n" + "="*50 + "\n")
 
     print("--- Summary Statistics for Numerical Columns ---")
-    print(df.describe())
+    summary = {}
+    for name, acc in stats.items():
+        n = acc['count']
+        if pa.types.is_integer(acc['type']) or pa.types.is_floating(acc['type']):
+            mean = acc['mean'] if n else math.nan
+            std = math.sqrt(acc['m2'] / (n - 1)) if n > 1 else math.nan
+            summary[name] = {'count': n, 'mean': mean, 'std': std, 'min': acc['min'], 'max': acc['max']}
+    print(pd.DataFrame(summary, index=['count', 'mean', 'std', 'min', 'max']))
     print("\n" + "="*50 + "\n")
 
     print("--- Missing Value Counts ---")
-    print(df.isnull().sum())
+    print(pd.Series({name: acc['nulls'] for name, acc in stats.items()}))
     print("\n" + "="*50 + "\n")
 
 except FileNotFoundError:
     print("Error: 'Car_Insurance_Claim.csv' not found.")
-    print("Please make sure the CSV file is in the same directory as the script.")
\ No newline at end of file
+    print("Please make sure the CSV file is in the same directory as the script.")
+except pa.ArrowInvalid as e:
+    # Column types are fixed from the first block; a later value that does not fit ends the scan
+    print(f"Error: could not parse 'Car_Insurance_Claim.csv': {e}")
+    print("A column's later values do not match the type inferred from the start of the file.")
\ No newline at end of file